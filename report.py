@@ -1,12 +1,24 @@
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QLineEdit, QComboBox, QSpinBox, QTextEdit, QMessageBox,
     QPushButton, QVBoxLayout, QFormLayout, QTabWidget, QGridLayout, QApplication,
-    QSpacerItem, QHBoxLayout, QDialog, QDialogButtonBox
+    QSpacerItem, QHBoxLayout, QDialog, QDialogButtonBox, QCompleter, QFileDialog
 )
 
-from PyQt6.QtCore import QThreadPool, QRunnable, QObject, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QThreadPool, QRunnable, QObject, pyqtSignal, pyqtSlot, QStringListModel, Qt, QPointF
+
+from PyQt6.QtGui import QPainter, QPen, QColor, QPolygonF
 
 import textwrap
+import bisect
+import difflib
+import time
+import csv
+import gzip
+import threading
+import math
+import socket
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import sys
 import os
@@ -19,16 +31,864 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def calculate_rows(data, settings):
+    """Price, revenue, labor and contribution for each line of a report"""
+    wage = float(data['wage'])
+    prices = settings.get('prices', {})
+    handpack_prices = settings.get('handpacks', {})
+    # Get threshold from settings or default to 5000
+    threshold = settings.get('qty_threshold', 5000)
+
+    rows = []
+    for line in ['AZ', 'BZ', 'DZ', 'EZ', 'FZ', 'H1', 'H2']:
+        entry = data['lines'].get(line, {})
+        ltype = entry.get('type', '')
+        qty = entry.get('qty', '')
+        try: 
+            qty_val = int(qty) if qty else 0
+        except (ValueError, TypeError): 
+            qty_val = 0
+
+        if line in ['H1', 'H2']:
+            price = handpack_prices.get(ltype, 0.0)
+        elif line in prices:
+            price = prices[line][0] if qty_val > threshold else prices[line][1]
+        else:
+            price = 0.0
+
+        people = entry.get('ple', 0)
+        hours = entry.get('hrs', 0)
+
+        revenue = qty_val * price
+        labor = hours * people * wage
+        rows.append({
+            'line': line, 'type': ltype, 'qty': qty, 'qty_val': qty_val, 'price': price,
+            'ple': people, 'hrs': hours, 'revenue': revenue, 'labor': labor,
+            'contribution': revenue - labor
+        })
+    return rows
+
+class ReportHistory:
+    """Append-only log of generated reports, one JSON record per line"""
+    def __init__(self, path=None):
+        self.path = path or resource_path("history.jsonl")
+
+    def append(self, record):
+        with open(self.path, 'a', encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def records(self):
+        """Stream the stored records without holding the whole history in memory"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # skip a partially written line
+
+    def load(self):
+        return list(self.records())
+
+    def shifts(self):
+        """Stream the latest submission of each shift, skipping ones regenerated later.
+
+        A shift is identified by shift_key, as in a merge; the first pass keeps only
+        the position of each shift's latest record, not the records themselves.
+        """
+        latest = {}  # shift key -> (generated_at, position)
+        for position, record in enumerate(self.records()):
+            key = shift_key(record)
+            generated_at = record.get('generated_at', 0)
+            if key not in latest or generated_at >= latest[key][0]:
+                latest[key] = (generated_at, position)
+        keep = {position for generated_at, position in latest.values()}
+        for position, record in enumerate(self.records()):
+            if position in keep:
+                yield record
+
+    @staticmethod
+    def make_record(data, settings, rows, date):
+        return {
+            'date': date,
+            'generated_at': time.time(),
+            'name': data['name'],
+            'shift': data['shift'],
+            'wage': float(data['wage']),
+            'qty_threshold': settings.get('qty_threshold', 5000),
+            'lines': {row['line']: {'type': row['type'], 'qty': row['qty_val'], 'ple': row['ple'],
+                                    'hrs': row['hrs'], 'price': row['price']} for row in rows},
+            'flags': data.get('flags', {}),
+            'notes': data.get('notes', '')
+        }
+
+    @staticmethod
+    def to_report_data(record, pricing):
+        """Generator data for re-drawing a stored report with the given pricing"""
+        return {
+            'name': record['name'],
+            'shift': record['shift'],
+            'date': record['date'],
+            'lines': {line: {'type': entry['type'], 'qty': str(entry['qty']) if entry['qty'] else '',
+                             'ple': entry['ple'], 'hrs': entry['hrs']} for line, entry in record['lines'].items()},
+            'notes': record.get('notes', ''),
+            'wage': pricing['wage'],
+            'flags': record.get('flags', {}),
+            'regenerated': True,
+            'outfile': f"contribution_report_{record['date']}_shift{record['shift']}.pdf"
+        }
+
+ARCHIVE_FORMAT = "contribution-history"
+
+def record_totals(record):
+    """Per-line and shift totals of a stored report, counted the way Generator does"""
+    wage = float(record.get('wage', 0.0))
+    lines = {}
+    revenue_total = labor_total = 0.0
+    for line, entry in record.get('lines', {}).items():
+        qty = entry.get('qty', 0) or 0
+        revenue = qty * entry.get('price', 0.0)
+        labor = entry.get('hrs', 0) * entry.get('ple', 0) * wage
+        lines[line] = (qty, revenue, labor, revenue - labor)
+        if qty > 0:
+            revenue_total += revenue
+            labor_total += labor
+    return lines, (revenue_total, labor_total, revenue_total - labor_total)
+
+def write_archive(path, records, station, plant):
+    """Write records as a gzipped JSON lines archive with a header line"""
+    from datetime import datetime
+    header = {'format': ARCHIVE_FORMAT, 'version': 1, 'station': station, 'plant': plant,
+              'exported_at': datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+    with gzip.open(path, 'wt', encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for record in records:
+            # Records keep the station and plant they came from through later merges
+            record = dict(record)
+            record.setdefault('station', station)
+            record.setdefault('plant', plant)
+            f.write(json.dumps(record) + "\n")
+
+def iter_archive(path):
+    """(record, raw JSON line) for each record of an archive written by write_archive"""
+    with gzip.open(path, 'rt', encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get('format') != ARCHIVE_FORMAT:
+            raise ValueError(f"{os.path.basename(path)} is not a report history archive")
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'station' not in record or 'plant' not in record:
+                record.setdefault('station', header.get('station', ''))
+                record.setdefault('plant', header.get('plant', ''))
+                line = json.dumps(record) + "\n"
+            yield record, line
+
+def shift_key(record):
+    # A shift is identified by plant, date and shift; a second submission replaces the first.
+    # A station with no plant set is its own plant, so two such stations never collide
+    return (record.get('plant') or record.get('station', ''), record['date'], str(record['shift']))
+
+def summarize_archive(path):
+    """Map step of a merge: latest submission of each shift in one archive.
+
+    Returns shift key -> (generated_at, station, name, raw JSON line, totals). The
+    record travels back as its JSON text, which is much cheaper to pass between
+    processes than the parsed dict.
+    """
+    latest = {}
+    for record, line in iter_archive(path):
+        key = shift_key(record)
+        generated_at = record.get('generated_at', 0)
+        if key not in latest or generated_at > latest[key][0]:
+            latest[key] = (generated_at, record.get('station', ''), record.get('name', ''), line, record_totals(record))
+    return latest
+
+class HistoryMerge:
+    """Reduce step of a merge: keeps the latest submission of each shift and sums totals"""
+    def __init__(self):
+        self.shifts = {}  # shift key -> summarize_archive value
+
+    def add(self, summary):
+        for key, value in summary.items():
+            current = self.shifts.get(key)
+            if current is None or value[0] > current[0]:
+                self.shifts[key] = value
+
+    def line_totals(self):
+        """(plant, line) -> [shifts run, qty, revenue, labor, contribution]"""
+        totals = {}
+        for (plant, date, shift), (generated_at, station, name, raw, (lines, shift_total)) in self.shifts.items():
+            for line, (qty, revenue, labor, contribution) in lines.items():
+                if qty <= 0:
+                    continue  # left out of the shift totals too, as in the PDF
+                total = totals.setdefault((plant, line), [0, 0, 0.0, 0.0, 0.0])
+                total[0] += 1
+                total[1] += qty
+                total[2] += revenue
+                total[3] += labor
+                total[4] += contribution
+        return totals
+
+    def write(self, path):
+        """Write the merged shifts as an archive (records keep their own station and plant)"""
+        from datetime import datetime
+        header = {'format': ARCHIVE_FORMAT, 'version': 1, 'station': "merged", 'plant': "",
+                  'exported_at': datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+        with gzip.open(path, 'wt', encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for key in sorted(self.shifts):
+                f.write(self.shifts[key][3])
+
+def parse_grid(text):
+    """Parse "8, 9.5, 10:12:0.5" into a sorted list of numbers (ranges are start:stop:step, inclusive)"""
+    values = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            start, stop, step = (float(v) for v in part.split(':'))
+            if step <= 0:
+                raise ValueError(f"Step must be greater than 0 in '{part}'")
+            count = int(round((stop - start) / step))
+            values.update(round(start + i * step, 6) for i in range(count + 1))
+        else:
+            values.add(float(part))
+    if not values:
+        raise ValueError("No values given")
+    return sorted(values)
+
+class ScenarioSweep:
+    """Contribution over grids of wage, threshold and machine prices against stored shifts.
+
+    Each line's history is reduced once to sorted quantities with prefix sums and a
+    total of labor hours, so any threshold splits the revenue into over/under totals
+    with one bisect and every price/wage combination after that is arithmetic.
+    """
+    def __init__(self, records):
+        self.shifts = 0
+        self.qtys = {}        # machine line -> sorted quantities of shifts that ran
+        self.prefix = {}      # machine line -> prefix sums of those quantities
+        self.hours = {}       # line -> total person-hours of shifts that ran
+        self.runs = {}        # line -> number of shifts that ran
+        self.shift_hours = {} # line -> total shift hours (not person-hours) of shifts that ran
+        self.fixed = {}       # handpack line -> revenue at the recorded price
+        for record in records:
+            self.shifts += 1
+            for line, entry in record.get('lines', {}).items():
+                qty = entry.get('qty', 0) or 0
+                if qty <= 0:
+                    continue
+                self.hours[line] = self.hours.get(line, 0.0) + entry.get('hrs', 0) * entry.get('ple', 0)
+                self.runs[line] = self.runs.get(line, 0) + 1
+                self.shift_hours[line] = self.shift_hours.get(line, 0.0) + entry.get('hrs', 0)
+                if line in ['H1', 'H2']:
+                    self.fixed[line] = self.fixed.get(line, 0.0) + qty * entry.get('price', 0.0)
+                else:
+                    self.qtys.setdefault(line, []).append(qty)
+        for line, qtys in self.qtys.items():
+            qtys.sort()
+            sums = [0]
+            for qty in qtys:
+                sums.append(sums[-1] + qty)
+            self.prefix[line] = sums
+
+    def split(self, line, threshold):
+        """Total quantity over and under (or at) the threshold"""
+        qtys, sums = self.qtys.get(line, []), self.prefix.get(line, [0])
+        i = bisect.bisect_right(qtys, threshold)
+        return sums[-1] - sums[i], sums[i]
+
+    def sweep(self, wages, thresholds, over_prices, under_prices):
+        """Yield (line, wage, threshold, over, under, revenue, labor, contribution).
+
+        over_prices and under_prices map each machine line to its price grid. Plant
+        totals are yielded with line "ALL" and pair the i-th price of every line.
+        """
+        lines = sorted(set(over_prices) & set(under_prices))
+        for threshold in thresholds:
+            splits = {line: self.split(line, threshold) for line in lines}
+            for wage in wages:
+                labor = {line: self.hours.get(line, 0.0) * wage for line in self.hours}
+                fixed_revenue = sum(self.fixed.values())
+                fixed_labor = sum(labor.get(line, 0.0) for line in self.fixed)
+                for i, over in enumerate(over_prices[lines[0]] if lines else []):
+                    for j, under in enumerate(under_prices[lines[0]]):
+                        total_revenue, total_labor = fixed_revenue, fixed_labor
+                        for line in lines:
+                            o, u = over_prices[line][i], under_prices[line][j]
+                            over_qty, under_qty = splits[line]
+                            revenue = o * over_qty + u * under_qty
+                            yield (line, wage, threshold, o, u, revenue, labor.get(line, 0.0), revenue - labor.get(line, 0.0))
+                            total_revenue += revenue
+                            total_labor += labor.get(line, 0.0)
+                        yield ('ALL', wage, threshold, over, under, total_revenue, total_labor, total_revenue - total_labor)
+
+    def break_even(self, line, wage, threshold, over, under):
+        """Quantity per shift and crew size at which a line's average shift breaks even"""
+        runs = self.runs.get(line, 0)
+        if not runs:
+            return None, None
+        labor = self.hours.get(line, 0.0) * wage / runs
+        over_qty, under_qty = self.split(line, threshold)
+        revenue = (over * over_qty + under * under_qty) / runs
+
+        qty = None
+        if under > 0 and labor / under <= threshold:
+            qty = labor / under
+        elif over > 0:
+            # Past the threshold the over price applies, so never less than threshold + 1
+            qty = max(labor / over, threshold + 1)
+
+        crew = None
+        shift_hours = self.shift_hours.get(line, 0.0) / runs
+        if shift_hours > 0 and wage > 0:
+            crew = revenue / (shift_hours * wage)
+        return qty, crew
+
+class RunningStats:
+    """Count, mean and variance of a stream of values, updated in O(1) (Welford)"""
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        """Undo an earlier update with this value"""
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.n * self.mean - value) / (self.n - 1)
+        self.m2 = max(self.m2 - (value - mean) * (value - self.mean), 0.0)
+        self.mean = mean
+        self.n -= 1
+
+    @property
+    def std(self):
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+
+    def to_list(self):
+        return [self.n, self.mean, self.m2]
+
+class AnomalyDetector:
+    """Flags report lines that look unlike earlier shifts of the same line and run type"""
+    METRICS = ['qty_val', 'price', 'labor', 'contribution']
+    MIN_SAMPLES = 10
+    Z_LIMIT = 3.0
+    RECENT_SHIFTS = 20  # shifts whose values are kept so a re-submission replaces them
+    RELEARN_SHIFTS = 5  # flagged shifts in a row after which a line's level is taken to have changed
+
+    def __init__(self, stats=None, recent=None, held=None):
+        # "line|run type|metric" -> RunningStats
+        self.stats = {key: RunningStats(*values) for key, values in (stats or {}).items()}
+        # "date|shift" -> {"line|run type|metric": value counted for that shift}
+        self.recent = dict(recent or {})
+        # "line|run type|metric" -> {"date|shift": value}, flagged values kept out of the stats
+        self.held = {key: dict(values) for key, values in (held or {}).items()}
+
+    def to_settings(self):
+        return {key: stat.to_list() for key, stat in self.stats.items()}
+
+    def check(self, rows):
+        """Map each suspicious line to a list of reasons"""
+        flags = {}
+        for row in rows:
+            reasons = []
+            if row['type'] == "Not Run":
+                if row['qty'] or row['ple'] or row['hrs']:
+                    reasons.append("values entered on a Not Run line")
+            elif row['qty'] and str(row['qty']).strip() != str(row['qty_val']):
+                reasons.append(f"qty '{row['qty']}' is not a whole number")
+            elif row['qty_val'] > 0 and not (row['ple'] and row['hrs']):
+                reasons.append("qty entered with no people or hours")
+            elif row['qty_val'] > 0:
+                for metric in self.METRICS:
+                    stat = self.stats.get(f"{row['line']}|{row['type']}|{metric}")
+                    if not stat or stat.n < self.MIN_SAMPLES or stat.std == 0:
+                        continue
+                    if abs(row[metric] - stat.mean) / stat.std > self.Z_LIMIT:
+                        name = 'qty' if metric == 'qty_val' else metric
+                        fmt = ",.0f" if metric == 'qty_val' else ",.4f" if metric == 'price' else ",.2f"
+                        reasons.append(f"{name} {row[metric]:{fmt}} (usual {stat.mean:{fmt}} \u00b1 {stat.std:{fmt}})")
+            if reasons:
+                flags[row['line']] = reasons
+        return flags
+
+    def update(self, rows, shift, flags=()):
+        """Count a generated shift, replacing what an earlier submission of it counted.
+
+        Flagged lines are held back rather than counted, so one confirmed typo cannot
+        widen the usual range. If a line is flagged RELEARN_SHIFTS times in a row its
+        stats are restarted from the held values.
+        """
+        for key, value in self.recent.pop(shift, {}).items():
+            if key in self.stats:
+                self.stats[key].remove(value)
+        for values in self.held.values():
+            values.pop(shift, None)
+
+        counted = {}
+        for row in rows:
+            if row['type'] == "Not Run" or row['qty_val'] <= 0:
+                continue
+            for metric in self.METRICS:
+                key = f"{row['line']}|{row['type']}|{metric}"
+                if row['line'] not in flags:
+                    self.held.pop(key, None)
+                    self.stats.setdefault(key, RunningStats()).update(row[metric])
+                    counted[key] = row[metric]
+                    continue
+                held = self.held.setdefault(key, {})
+                held[shift] = row[metric]
+                if len(held) >= self.RELEARN_SHIFTS:
+                    self.relearn(key)
+                    counted[key] = held[shift]
+                    del self.held[key]
+
+        self.recent[shift] = counted
+        while len(self.recent) > self.RECENT_SHIFTS:
+            del self.recent[next(iter(self.recent))]
+        self.held = {key: values for key, values in self.held.items() if values}
+
+    def relearn(self, key):
+        """Restart a line's stats from its held values"""
+        stat = self.stats[key] = RunningStats()
+        for counted in self.recent.values():
+            counted.pop(key, None)  # counted before the restart, so no longer in stat
+        for shift, value in self.held[key].items():
+            stat.update(value)
+            if shift in self.recent:
+                self.recent[shift][key] = value
+
+class PriceHistory:
+    """Every version of wage, threshold and prices with the time it took effect.
+
+    Versions of each setting are kept sorted by effective time, so the value in
+    force at any time is a bisect. Keys are "wage", "qty_threshold",
+    "price|<line>" ([over, under]) and "handpack|<name>" (None once deleted).
+    """
+    EPOCH = "1970-01-01T00:00:00"
+
+    def __init__(self, versions=None):
+        self.times = {}   # key -> sorted effective times
+        self.values = {}  # key -> value at each of those times
+        for key, entries in (versions or {}).items():
+            self.times[key] = [when for when, value in entries]
+            self.values[key] = [value for when, value in entries]
+
+    def to_settings(self):
+        return {key: [[when, value] for when, value in zip(self.times[key], self.values[key])] for key in self.times}
+
+    @staticmethod
+    def timestamp(when=None):
+        """Effective time for a datetime, epoch seconds or YYYY-MM-DD date (end of that day)"""
+        from datetime import datetime
+        if when is None:
+            when = datetime.now()
+        elif isinstance(when, (int, float)):
+            when = datetime.fromtimestamp(when)
+        elif isinstance(when, str):
+            return when + "T23:59:59" if len(when) == 10 else when
+        return when.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def record(self, key, value, when=None, initial=False):
+        """Add a version, unless the value is unchanged. initial versions apply from the start of time"""
+        times, values = self.times.setdefault(key, []), self.values.setdefault(key, [])
+        when = self.EPOCH if initial else self.timestamp(when)
+        i = bisect.bisect_right(times, when)
+        if i and values[i - 1] == value:
+            return
+        if i and times[i - 1] == when:
+            values[i - 1] = value
+        else:
+            times.insert(i, when)
+            values.insert(i, value)
+
+    def value(self, key, when=None, default=None):
+        times = self.times.get(key)
+        if not times:
+            return default
+        i = bisect.bisect_right(times, self.timestamp(when))
+        return self.values[key][i - 1] if i else default
+
+    def record_settings(self, settings, when=None, initial=False):
+        """Version every pricing value in settings that differs from the one in force"""
+        self.record('wage', float(settings.get('wage', 10.00)), when, initial)
+        self.record('qty_threshold', settings.get('qty_threshold', 5000), when, initial)
+        for line, prices in settings.get('prices', {}).items():
+            self.record(f"price|{line}", list(prices), when, initial)
+        handpacks = settings.get('handpacks', {})
+        for name, price in handpacks.items():
+            self.record(f"handpack|{name}", float(price), when, initial)
+        for key in self.times:
+            if key.startswith("handpack|") and key[9:] not in handpacks:
+                self.record(key, None, when)
+
+    def snapshot(self, when=None):
+        """Settings-shaped dict of the wage, threshold and prices in force at a time"""
+        snapshot = {
+            'wage': self.value('wage', when, 10.00),
+            'qty_threshold': self.value('qty_threshold', when, 5000),
+            'prices': {},
+            'handpacks': {}
+        }
+        for key in self.times:
+            kind, _, name = key.partition("|")
+            value = self.value(key, when)
+            if value is None:
+                continue
+            if kind == "price":
+                snapshot['prices'][name] = value
+            elif kind == "handpack":
+                snapshot['handpacks'][name] = value
+        return snapshot
+
+    def price(self, line, run_type, qty, when=None):
+        """Price for a line, run type and quantity as of a time"""
+        if line in ['H1', 'H2']:
+            return self.value(f"handpack|{run_type}", when) or 0.0
+        prices = self.value(f"price|{line}", when)
+        if not prices:
+            return 0.0
+        return prices[0] if qty > self.value('qty_threshold', when, 5000) else prices[1]
+
+class TrendData:
+    """Daily totals of each metric per line and shift, built from the report history"""
+    METRICS = ['Contribution', 'Revenue', 'Labor', 'Qty']
+
+    def __init__(self, records):
+        self.series = {}  # (metric, line, shift) -> (sorted day ordinals, daily totals)
+        self.counted = {}  # shift key -> (day, shift, line totals) added for that shift
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        """Add one report to the daily totals, replacing an earlier submission of its shift"""
+        from datetime import date
+
+        try:
+            day = date.fromisoformat(record['date']).toordinal()
+        except (KeyError, ValueError):
+            return
+        key = shift_key(record)
+        if key in self.counted:
+            self.apply(*self.counted[key], sign=-1)
+        self.counted[key] = (day, str(record['shift']), record_totals(record)[0])
+        self.apply(*self.counted[key])
+
+    def apply(self, day, shift, lines, sign=1):
+        for line, (qty, revenue, labor, contribution) in lines.items():
+            if qty <= 0:
+                continue  # lines that did not run are left out of the totals, as in the PDF
+            values = zip(self.METRICS, (contribution, revenue, labor, qty))
+            for metric, value in values:
+                for key in [(metric, l, s) for l in (line, 'All') for s in (shift, 'All')]:
+                    days, totals = self.series.setdefault(key, ([], []))
+                    # New reports are almost always for the latest day, so this is usually an append
+                    i = bisect.bisect_left(days, day)
+                    if i < len(days) and days[i] == day:
+                        totals[i] += sign * value
+                    else:
+                        days.insert(i, day)
+                        totals.insert(i, sign * value)
+
+    @staticmethod
+    def downsample(days, values, level):
+        """Min, max and mean of the values in buckets of 2**level days: (starts, mins, maxs, means)"""
+        width = 2 ** level
+        starts, mins, maxs, means = [], [], [], []
+        count = 0
+        for day, value in zip(days, values):
+            start = day - day % width
+            if not starts or starts[-1] != start:
+                if starts:
+                    means[-1] /= count
+                starts.append(start)
+                mins.append(value)
+                maxs.append(value)
+                means.append(0.0)
+                count = 0
+            mins[-1] = min(mins[-1], value)
+            maxs[-1] = max(maxs[-1], value)
+            means[-1] += value
+            count += 1
+        if starts:
+            means[-1] /= count
+        return starts, mins, maxs, means
+
+class TrendChart(QWidget):
+    """Line chart of one series that zooms with the mouse wheel and pans by dragging.
+
+    The series is drawn from min/max/mean buckets of 2**level days, choosing the
+    level that gives about one bucket per pixel. Missing levels are requested with
+    level_needed and the nearest cached level is drawn until they arrive.
+    """
+    level_needed = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.setMinimumHeight(300)
+        self.levels = {}    # level -> buckets from TrendData.downsample
+        self.bounds = None  # (first day, last day) of the series
+        self.view = None    # (first day, last day) on screen
+        self.drag_x = None
+
+    def set_series(self, levels, bounds):
+        self.levels = levels
+        self.bounds = bounds
+        self.view = (bounds[0] - 1, bounds[1] + 1) if bounds else None
+        self.update()
+
+    def plot_rect(self):
+        return 70, 10, max(self.width() - 80, 1), max(self.height() - 40, 1)
+
+    def level(self):
+        days = self.view[1] - self.view[0]
+        return max(0, math.ceil(math.log2(max(days / self.plot_rect()[2], 1))))
+
+    def paintEvent(self, event):
+        from datetime import date
+
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("white"))
+        left, top, width, height = self.plot_rect()
+        painter.setPen(QPen(QColor("black")))
+        painter.drawRect(left, top, width, height)
+        if not self.view:
+            painter.drawText(left + 10, top + 20, "No report history to chart yet.")
+            return
+
+        level = self.level()
+        if level not in self.levels:
+            self.level_needed.emit(level)
+            if not self.levels:
+                return
+            level = min(self.levels, key=lambda cached: abs(cached - level))
+        starts, mins, maxs, means = self.levels[level]
+
+        first, last = self.view
+        i = max(bisect.bisect_left(starts, first - 2 ** level), 0)
+        j = bisect.bisect_right(starts, last)
+        if i >= j:
+            return
+        low = min(min(mins[i:j]), 0)
+        high = max(max(maxs[i:j]), 0)
+        if high == low:
+            high = low + 1
+
+        def x(day):
+            return left + (day - first) / (last - first) * width
+
+        def y(value):
+            return top + (high - value) / (high - low) * height
+
+        painter.setClipRect(left, top, width, height)
+        painter.setPen(QPen(QColor("lightgray")))
+        painter.drawLine(QPointF(left, y(0)), QPointF(left + width, y(0)))
+
+        # Range of each bucket, then a line through the bucket means
+        painter.setPen(QPen(QColor(150, 180, 230)))
+        half = 2 ** level / 2
+        for k in range(i, j):
+            if maxs[k] != mins[k]:
+                painter.drawLine(QPointF(x(starts[k] + half), y(mins[k])), QPointF(x(starts[k] + half), y(maxs[k])))
+        painter.setPen(QPen(QColor(20, 60, 160), 1.5))
+        painter.drawPolyline(QPolygonF([QPointF(x(starts[k] + half), y(means[k])) for k in range(i, j)]))
+        painter.setClipping(False)
+
+        painter.setPen(QPen(QColor("black")))
+        painter.drawText(5, top + 12, f"{high:,.0f}")
+        painter.drawText(5, top + height, f"{low:,.0f}")
+        painter.drawText(left, top + height + 20, date.fromordinal(max(int(first), 1)).isoformat())
+        painter.drawText(left + width - 70, top + height + 20, date.fromordinal(max(int(last), 1)).isoformat())
+        days_per_bucket = "day" if level == 0 else f"{2 ** level} days"
+        painter.drawText(left + width // 2 - 60, top + height + 20, f"1 point per {days_per_bucket}")
+
+    def wheelEvent(self, event):
+        if not self.view:
+            return
+        left, top, width, height = self.plot_rect()
+        first, last = self.view
+        anchor = first + (event.position().x() - left) / width * (last - first)
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = min(max((last - first) * factor, 7), (self.bounds[1] - self.bounds[0] + 2) * 2)
+        share = (anchor - first) / (last - first)
+        self.view = (anchor - span * share, anchor + span * (1 - share))
+        self.update()
+
+    def mousePressEvent(self, event):
+        self.drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_x is None or not self.view:
+            return
+        first, last = self.view
+        shift = (self.drag_x - event.position().x()) / self.plot_rect()[2] * (last - first)
+        self.view = (first + shift, last + shift)
+        self.drag_x = event.position().x()
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
 class WorkerSignals(QObject):
     error = pyqtSignal(str)
     file_saved_as = pyqtSignal(str)
+    bytes_written = pyqtSignal(str, int)
+    result = pyqtSignal(object)
+
+class TrendLoader(QRunnable):
+    def __init__(self):
+        super().__init__()
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            trends = TrendData(ReportHistory().shifts())
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.result.emit(trends)
+
+class Downsampler(QRunnable):
+    def __init__(self, days, values, key, level, version):
+        super().__init__()
+        # Copies of the series, which the UI thread keeps adding to
+        self.days = days
+        self.values = values
+        self.key = key
+        self.level = level
+        self.version = version
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        buckets = TrendData.downsample(self.days, self.values, self.level)
+        self.signals.result.emit((self.version, self.key, self.level, buckets))
+
+class Merger(QRunnable):
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            from datetime import datetime
+
+            today = datetime.today().strftime("%Y-%m-%d")
+            merge = HistoryMerge()
+            # Archives are parsed and totalled in separate processes, then reduced here as they finish
+            if len(self.paths) > 1 and (os.cpu_count() or 1) > 1:
+                with ProcessPoolExecutor() as pool:
+                    futures = [pool.submit(summarize_archive, path) for path in self.paths]
+                    for future in as_completed(futures):
+                        merge.add(future.result())
+            else:
+                for path in self.paths:
+                    merge.add(summarize_archive(path))
+
+            merge.write(f"merged_history_{today}.jsonl.gz")
+
+            outfile = f"merged_summary_{today}.csv"
+            with open(outfile, 'w', newline='', encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow([f"Archives merged: {len(self.paths)}", f"Shifts: {len(merge.shifts)}"])
+                writer.writerow(["Plant", "Line", "Shifts Run", "Qty", "Revenue", "Labor", "Contribution"])
+                for (plant, line), (runs, qty, revenue, labor, contribution) in sorted(merge.line_totals().items()):
+                    writer.writerow([plant, line, runs, qty, f"{revenue:.2f}", f"{labor:.2f}", f"{contribution:.2f}"])
+
+                writer.writerow([])
+                writer.writerow(["Plant", "Date", "Shift", "Station", "Name", "Revenue", "Labor", "Contribution"])
+                for key in sorted(merge.shifts):
+                    generated_at, station, name, raw, (lines, (revenue, labor, contribution)) = merge.shifts[key]
+                    writer.writerow([key[0], key[1], key[2], station, name,
+                                     f"{revenue:.2f}", f"{labor:.2f}", f"{contribution:.2f}"])
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.file_saved_as.emit(outfile)
 
 class Generator(QRunnable):
-    def __init__(self, data):
+    PROFILES = ["Standard", "Compact"]
+    LOGO_DPI = 150  # printed resolution of the logo in Compact PDFs
+    logo_lock = threading.Lock()
+    logo_bytes = None  # (source stamp, JPEG data) when no folder could hold the resized logo
+
+    def __init__(self, data, settings=None):
         super().__init__()
         self.data = data
+        # Pricing to use instead of settings.json, e.g. a PriceHistory snapshot
+        self.settings = settings
         self.signals = WorkerSignals()
 
+    @classmethod
+    def compact_logo(cls):
+        """Logo downsampled to its printed size at LOGO_DPI, made once and reused until logo.jpeg changes"""
+        import io
+        from reportlab.lib.utils import ImageReader
+
+        source = resource_path("logo.jpeg")
+        # Keyed on the logo's exact modification time and size: a copied-in logo keeps
+        # its original time, which can be older than the cached one
+        stat = os.stat(source)
+        stamp = f"{stat.st_mtime_ns:x}_{stat.st_size:x}"
+        prefix = f"logo_{cls.LOGO_DPI}dpi_"
+        name = f"{prefix}{stamp}.jpeg"
+        # The install folder can be read-only in the packaged app, so fall back to a
+        # per-user folder, and to memory if neither can be written
+        user_dir = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "DailyReportGenerator")
+        candidates = [resource_path(name), os.path.join(user_dir, name)]
+        with cls.logo_lock:
+            for cached in candidates:
+                if os.path.exists(cached):
+                    return cached
+            if cls.logo_bytes and cls.logo_bytes[0] == stamp:
+                return ImageReader(io.BytesIO(cls.logo_bytes[1]))
+            from PIL import Image
+
+            buffer = io.BytesIO()
+            with Image.open(source) as image:
+                size = (int(10 * cls.LOGO_DPI), int(1.25 * cls.LOGO_DPI))
+                image = image.convert("RGB")
+                if image.width > size[0] or image.height > size[1]:
+                    image = image.resize(size, Image.Resampling.LANCZOS)
+                image.save(buffer, "JPEG", quality=75, optimize=True)
+
+            for cached in candidates:
+                try:
+                    os.makedirs(os.path.dirname(cached), exist_ok=True)
+                    with open(cached + ".tmp", 'wb') as f:
+                        f.write(buffer.getvalue())
+                    os.replace(cached + ".tmp", cached)
+                except OSError:
+                    continue
+                # Logos made from earlier versions of logo.jpeg are no longer used
+                folder = os.path.dirname(cached)
+                for old in os.listdir(folder):
+                    if old.startswith(prefix) and old.endswith(".jpeg") and old != name:
+                        try:
+                            os.remove(os.path.join(folder, old))
+                        except OSError:
+                            pass
+                return cached
+            cls.logo_bytes = (stamp, buffer.getvalue())
+            return ImageReader(io.BytesIO(cls.logo_bytes[1]))
+
     @pyqtSlot()
     def run(self):
         try:
@@ -40,13 +900,19 @@ class Generator(QRunnable):
         
             data = self.data
             wage = float(data['wage'])
-            today = datetime.today().strftime("%Y-%m-%d")
+            today = data.get('date') or datetime.today().strftime("%Y-%m-%d")
 
-            outfile = f"contribution_report_{today}.pdf"
-            canvas = Canvas(outfile, pagesize=landscape(letter))
+            outfile = data.get('outfile') or f"contribution_report_{today}.pdf"
+            compact = data.get('pdf_profile') == "Compact"
+            # Compact PDFs always compress page streams (Standard keeps ReportLab's default)
+            # and use a logo sized for print. Only the standard fonts drawn with are
+            # referenced, and standard fonts are never embedded.
+            options = {'pageCompression': 1} if compact else {}
+            canvas = Canvas(outfile, pagesize=landscape(letter), **options)
             width, height = landscape(letter)
 
-            canvas.drawImage(resource_path("logo.jpeg"), 0.5 * inch, height - 1.5 * inch, width = 10 * inch, height = 1.25 * inch)
+            logo = self.compact_logo() if compact else resource_path("logo.jpeg")
+            canvas.drawImage(logo, 0.5 * inch, height - 1.5 * inch, width = 10 * inch, height = 1.25 * inch)
 
             canvas.setFont("Helvetica-Bold", 16)
             canvas.drawString(1 * inch, height - 2 * inch, "Production Contribution Report")
@@ -62,10 +928,10 @@ class Generator(QRunnable):
             start_y = height - 2.85 * inch
             row_height = 0.4 * inch
 
-            def draw_row(y, values, gray=False):
+            def draw_row(y, values, gray=False, flagged=False):
                 x = start_x
                 for i, val in enumerate(values):
-                    canvas.setFillColor(colors.grey if gray else colors.black)
+                    canvas.setFillColor(colors.red if flagged else colors.grey if gray else colors.black)
                     canvas.drawString(x + 5, y + 5, str(val))
                     x += col_widths[i] * inch
                 canvas.setFillColor(colors.black)
@@ -76,49 +942,28 @@ class Generator(QRunnable):
             total_labor = 0.0
             line_y = start_y - row_height
             
-            with open(resource_path("settings.json"), "r", encoding="utf-8") as f:
-                settings = json.load(f)
-    
-            prices = settings.get('prices', {})
-            handpack_prices = settings.get('handpacks', {})
-
-            for line in ['AZ', 'BZ', 'DZ', 'EZ', 'FZ', 'H1', 'H2']:
-                entry = data['lines'].get(line, {})
-                ltype = entry.get('type', '')
-                qty = entry.get('qty', '')
-                try: 
-                    qty_val = int(qty) if qty else 0
-                except (ValueError, TypeError): 
-                    qty_val = 0
+            settings = self.settings
+            if settings is None:
+                with open(resource_path("settings.json"), "r", encoding="utf-8") as f:
+                    settings = json.load(f)
 
-                if line in ['H1', 'H2']:
-                    price = handpack_prices.get(ltype, 0.0)
-                elif line in prices:
-                    # Get threshold from settings or default to 5000
-                    threshold = settings.get('qty_threshold', 5000)
-                    price = prices[line][0] if qty_val > threshold else prices[line][1]
-                else:
-                    price = 0.0
-
-                people = entry.get('ple', 0)
-                hours = entry.get('hrs', 0)
-
-                revenue = qty_val * price
-                labor = hours * people * wage
-                contribution = revenue - labor
-
-                if qty_val > 0:
-                    total_revenue += revenue
-                    total_labor += labor
+            rows = calculate_rows(data, settings)
+            flags = data.get('flags', {})
+            for row in rows:
+                qty = row['qty']
+                if row['qty_val'] > 0:
+                    total_revenue += row['revenue']
+                    total_labor += row['labor']
                 draw_row(
                     line_y,
-                    [line, ltype, qty_val if qty else "", f"{price:.4f}" if qty else "", people, hours,
-                    f"${revenue:.2f}" if qty else "", f"${labor:.2f}" if qty else "", f"${contribution:.2f}"],
-                    gray=(qty_val == 0)
+                    [row['line'] + ("*" if row['line'] in flags else ""), row['type'], row['qty_val'] if qty else "", f"{row['price']:.4f}" if qty else "", row['ple'], row['hrs'],
+                    f"${row['revenue']:.2f}" if qty else "", f"${row['labor']:.2f}" if qty else "", f"${row['contribution']:.2f}"],
+                    gray=(row['qty_val'] == 0),
+                    flagged=row['line'] in flags
                 )
                 line_y -= row_height
                 
-                if line == 'FZ':
+                if row['line'] == 'FZ':
                     line_y -= row_height * 0.5
 
             canvas.setFont("Helvetica-Bold", 12)
@@ -141,12 +986,203 @@ class Generator(QRunnable):
                 text.textLine("No notes provided")
             canvas.drawText(text)
 
+            if flags:
+                footnotes = [f"* {line}: {'; '.join(reasons)}"[:170] for line, reasons in flags.items()]
+                # Stack the footnotes up from the bottom margin, or give them their own
+                # page when they would run into the notes
+                flag_y = 0.4 * inch + 12 * (len(footnotes) - 1)
+                if flag_y > text.getY() - 4:
+                    canvas.showPage()
+                    canvas.setFont("Helvetica-Bold", 12)
+                    canvas.drawString(start_x, height - 1 * inch, "Unusual Entries")
+                    flag_y = height - 1.4 * inch
+                canvas.setFont("Helvetica", 9)
+                canvas.setFillColor(colors.red)
+                for footnote in footnotes:
+                    canvas.drawString(start_x, flag_y, footnote)
+                    flag_y -= 12
+                canvas.setFillColor(colors.black)
+
             canvas.save()
+
+            record = None
+            if not data.get('regenerated'):
+                record = ReportHistory.make_record(data, settings, rows, today)
+                ReportHistory().append(record)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.bytes_written.emit(outfile, os.path.getsize(outfile))
+        if record:
+            self.signals.result.emit(record)
+        self.signals.file_saved_as.emit(outfile)
+
+class Sweeper(QRunnable):
+    def __init__(self, wages, thresholds, over_changes, under_changes, prices):
+        super().__init__()
+        self.wages = wages
+        self.thresholds = thresholds
+        self.over_changes = over_changes
+        self.under_changes = under_changes
+        self.prices = prices
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            from datetime import datetime
+
+            today = datetime.today().strftime("%Y-%m-%d")
+            sweep = ScenarioSweep(ReportHistory().shifts())
+            if not sweep.shifts:
+                raise ValueError("No report history to analyze yet.")
+
+            # Price changes are percentages applied to each line's current prices
+            over_prices = {line: [over * (1 + pct / 100) for pct in self.over_changes]
+                           for line, (over, under) in self.prices.items()}
+            under_prices = {line: [under * (1 + pct / 100) for pct in self.under_changes]
+                            for line, (over, under) in self.prices.items()}
+
+            outfile = f"whatif_report_{today}.csv"
+            with open(outfile, 'w', newline='', encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow([f"Shifts analyzed: {sweep.shifts}"])
+                writer.writerow(["Line", "Wage", "Qty Threshold", "Over Price", "Under Price", "Revenue",
+                                 "Labor", "Contribution", "Break-Even Qty/Shift", "Break-Even Crew Size"])
+                for line, wage, threshold, over, under, revenue, labor, contribution in sweep.sweep(
+                        self.wages, self.thresholds, over_prices, under_prices):
+                    qty, crew = sweep.break_even(line, wage, threshold, over, under) if line != 'ALL' else (None, None)
+                    # Plant totals follow the line rows they add up; each line has its own prices
+                    price_cells = [f"{over:.4f}", f"{under:.4f}"] if line != 'ALL' else ["", ""]
+                    writer.writerow([line, f"{wage:.2f}", f"{threshold:g}", *price_cells,
+                                     f"{revenue:.2f}", f"{labor:.2f}", f"{contribution:.2f}",
+                                     f"{qty:.0f}" if qty is not None else "",
+                                     f"{crew:.1f}" if crew is not None else ""])
         except Exception as e:
             self.signals.error.emit(str(e))
             return
         self.signals.file_saved_as.emit(outfile)
 
+class OperatorRoster:
+    """Every operator name ever used, ranked by frecency (frequency decayed by age).
+
+    Names are kept in a sorted word index so prefix lookups are a bisect, and in a
+    trigram index so misspelled input can still find the intended name. Both are
+    updated in place when a name is recorded.
+    """
+    HALF_LIFE = 30 * 24 * 3600  # seconds for a use to lose half its weight
+    FUZZY_CUTOFF = 0.75
+
+    def __init__(self, entries=None):
+        self.entries = {}   # name -> [score, last_used]
+        self.words = []     # sorted (word, name) pairs, casefolded words
+        self.trigrams = {}  # trigram -> set of names
+        for name, (score, last_used) in (entries or {}).items():
+            self.entries[name] = [float(score), float(last_used)]
+            self._index(name)
+
+    @classmethod
+    def from_settings(cls, settings):
+        if 'roster' in settings:
+            return cls(settings['roster'])
+        # Seed from the old recent names list, most recent ranked highest
+        roster = cls()
+        now = time.time()
+        for i, name in enumerate(reversed(settings.get('recent_names', []))):
+            roster.record(name, now - len(settings['recent_names']) + i)
+        return roster
+
+    def to_settings(self):
+        return {name: [round(score, 6), last_used] for name, (score, last_used) in self.entries.items()}
+
+    @staticmethod
+    def _grams(text):
+        text = f"  {text.casefold()} "
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def _index(self, name):
+        key = name.casefold()
+        words = [key] + key.split()[1:]
+        for word in words:
+            bisect.insort(self.words, (word, name))
+        for gram in self._grams(name):
+            self.trigrams.setdefault(gram, set()).add(name)
+
+    def record(self, name, now=None):
+        """Count one use of a name, adding it to the indexes if it is new"""
+        now = time.time() if now is None else now
+        if name not in self.entries:
+            self.entries[name] = [0.0, now]
+            self._index(name)
+        self.entries[name] = [self.score(name, now) + 1.0, now]
+
+    def score(self, name, now=None):
+        score, last_used = self.entries[name]
+        now = time.time() if now is None else now
+        return score * 0.5 ** (max(now - last_used, 0) / self.HALF_LIFE)
+
+    def top(self, limit=10):
+        now = time.time()
+        return sorted(self.entries, key=lambda n: -self.score(n, now))[:limit]
+
+    def prefix(self, text):
+        """Names with any word starting with text (or the whole name starting with text)"""
+        key = text.casefold()
+        matches = set()
+        i = bisect.bisect_left(self.words, (key, ''))
+        while i < len(self.words) and self.words[i][0].startswith(key):
+            matches.add(self.words[i][1])
+            i += 1
+        return matches
+
+    def fuzzy(self, text, exclude=()):
+        """Names that look like a misspelling of text"""
+        key = text.casefold()
+        grams = self._grams(text)
+        hits = {}
+        for gram in grams:
+            for name in self.trigrams.get(gram, ()):
+                hits[name] = hits.get(name, 0) + 1
+
+        matches = {}
+        needed = max(1, len(grams) // 3)
+        for name, shared in hits.items():
+            if shared < needed or name in exclude:
+                continue
+            folded = name.casefold()
+            ratio = max(difflib.SequenceMatcher(None, key, folded).ratio(),
+                        difflib.SequenceMatcher(None, key, folded[:len(key)]).ratio())
+            if ratio >= self.FUZZY_CUTOFF:
+                matches[name] = ratio
+        return matches
+
+    def search(self, text, limit=8):
+        text = text.strip()
+        if not text:
+            return self.top(limit)
+
+        now = time.time()
+        matches = sorted(self.prefix(text), key=lambda n: -self.score(n, now))[:limit]
+        if len(matches) < limit and len(text) >= 3:
+            fuzzy = self.fuzzy(text, exclude=matches)
+            matches += sorted(fuzzy, key=lambda n: (-fuzzy[n], -self.score(n, now)))[:limit - len(matches)]
+        return matches
+
+    def closest(self, text):
+        """Best existing spelling for a name that is not on the roster, or None"""
+        text = text.strip()
+        if not text or text in self.entries:
+            return None
+        for name in self.entries:
+            if name.casefold() == text.casefold():
+                return name
+        fuzzy = self.fuzzy(text)
+        full = {n: r for n, r in fuzzy.items()
+                if difflib.SequenceMatcher(None, text.casefold(), n.casefold()).ratio() >= self.FUZZY_CUTOFF}
+        if not full:
+            return None
+        return max(full, key=lambda n: (full[n], self.score(n)))
+
 class Report(QWidget):
     def __init__(self):
         super().__init__()
@@ -165,6 +1201,10 @@ class Report(QWidget):
             }
         }
         self.settings = self.load_settings()
+        self.price_history = PriceHistory(self.settings.get('price_history'))
+        if 'price_history' not in self.settings:
+            # Seed before anything can change: the prices found have applied up to now
+            self.price_history.record_settings(self.settings, initial=True)
 
         VERSION = "v1.3.1"
         self.setWindowTitle(f"Daily Report Generator {VERSION}")
@@ -181,10 +1221,22 @@ class Report(QWidget):
         self.name.lineEdit().setPlaceholderText("Enter your full name") # type: ignore
         self.name.setFixedWidth(200)
         
-        # Load recent names
-        recent_names = self.settings.get('recent_names', [])
+        # Load recent names; the full roster backs the type-ahead
+        self.roster = OperatorRoster.from_settings(self.settings)
+        recent_names = self.roster.top(10)
         if recent_names:
             self.name.addItems(recent_names)
+
+        self.name_model = QStringListModel()
+        self.name_completer = QCompleter(self.name_model, self)
+        self.name_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.name_completer.setMaxVisibleItems(8)
+        self.name.setCompleter(self.name_completer)
+        self.name.lineEdit().textEdited.connect(self.update_name_suggestions) # type: ignore
+
+        self.anomalies = AnomalyDetector(self.settings.get('line_stats'), self.settings.get('line_stats_recent'),
+                                         self.settings.get('line_stats_held'))
+        self.pending_rows = None
         
         self.shift = QSpinBox()
         self.shift.setRange(1, 2)
@@ -265,6 +1317,8 @@ class Report(QWidget):
         self.generate_btn = QPushButton("Generate PDF")
         self.generate_btn.clicked.connect(self.generate)
         input_layout.addWidget(self.generate_btn)
+        self.status_label = QLabel("")
+        input_layout.addWidget(self.status_label)
 
         input_tab = QWidget()
         input_tab.setLayout(input_layout)
@@ -274,6 +1328,13 @@ class Report(QWidget):
         self.wage_input = QLineEdit()
 
         self.wage_input.setText(str(self.settings.get('wage', 10.00)))
+
+        # Station and plant identify this computer's reports when histories are merged
+        self.station_input = QLineEdit(self.settings.get('station') or socket.gethostname())
+        self.plant_input = QLineEdit(self.settings.get('plant', ''))
+        self.plant_input.setPlaceholderText("Same as station")
+        self.station_input.editingFinished.connect(self.update_station)
+        self.plant_input.editingFinished.connect(self.update_station)
         
         self.machine_fields = {}
         self.handpack_fields = {}
@@ -317,8 +1378,15 @@ class Report(QWidget):
         edit_machine_button.clicked.connect(self.show_edit_machine_dialog)
         edit_threshold_button.clicked.connect(self.show_edit_threshold_dialog)
         
+        whatif_button = QPushButton("What-If Analysis")
+        whatif_button.clicked.connect(self.show_whatif_dialog)
+        regenerate_button = QPushButton("Regenerate Reports")
+        regenerate_button.clicked.connect(self.show_regenerate_dialog)
+        
         machine_button_layout.addWidget(edit_machine_button)
         machine_button_layout.addWidget(edit_threshold_button)
+        machine_button_layout.addWidget(whatif_button)
+        machine_button_layout.addWidget(regenerate_button)
         
         # Add machine button layout to settings
         machine_layout.addLayout(machine_button_layout, 6, 0, 1, 3)
@@ -362,12 +1430,75 @@ class Report(QWidget):
         
         settings_layout.addRow(QLabel("Hand Pack Price:"))
         settings_layout.addRow(handpack_layout)
+        settings_layout.addItem(QSpacerItem(0, 20))
+        
+        station_layout = QHBoxLayout()
+        station_layout.addWidget(QLabel("Station"))
+        station_layout.addWidget(self.station_input)
+        station_layout.addWidget(QLabel("Plant"))
+        station_layout.addWidget(self.plant_input)
+        
+        history_button_layout = QHBoxLayout()
+        export_button = QPushButton("Export History")
+        merge_button = QPushButton("Merge Histories")
+        export_button.clicked.connect(self.export_history)
+        merge_button.clicked.connect(self.merge_histories)
+        history_button_layout.addWidget(export_button)
+        history_button_layout.addWidget(merge_button)
+        
+        self.pdf_profile = QComboBox()
+        self.pdf_profile.addItems(Generator.PROFILES)
+        self.pdf_profile.setCurrentText(self.settings.get('pdf_profile', "Standard"))
+        self.pdf_profile.currentTextChanged.connect(self.update_pdf_profile)
+        
+        settings_layout.addRow(QLabel("PDF Output:"))
+        settings_layout.addRow(self.pdf_profile)
+        settings_layout.addItem(QSpacerItem(0, 20))
+        
+        settings_layout.addRow(QLabel("Report History:"))
+        settings_layout.addRow(station_layout)
+        settings_layout.addRow(history_button_layout)
         
 
         settings_tab = QWidget()
         settings_tab.setLayout(settings_layout)
         self.tabs.addTab(settings_tab, "Settings")
 
+        # === Tab 3: Trends ===
+        self.trends = None
+        self.trend_cache = {}    # (metric, line, shift) -> {level: buckets}
+        self.trend_pending = set()
+        self.trend_version = 0   # bumped whenever the series change, so older results are dropped
+        self.trend_metric = QComboBox()
+        self.trend_metric.addItems(TrendData.METRICS)
+        self.trend_line = QComboBox()
+        self.trend_line.addItems(['All'] + line_order)
+        self.trend_shift = QComboBox()
+        self.trend_shift.addItems(['All', '1', '2'])
+        for combo in (self.trend_metric, self.trend_line, self.trend_shift):
+            combo.currentTextChanged.connect(self.show_trend)
+        self.trend_chart = TrendChart()
+        self.trend_chart.level_needed.connect(self.downsample_trend)
+        
+        trend_controls = QHBoxLayout()
+        trend_controls.addWidget(QLabel("Show"))
+        trend_controls.addWidget(self.trend_metric)
+        trend_controls.addWidget(QLabel("Line"))
+        trend_controls.addWidget(self.trend_line)
+        trend_controls.addWidget(QLabel("Shift"))
+        trend_controls.addWidget(self.trend_shift)
+        trend_controls.addStretch()
+        
+        trend_layout = QVBoxLayout()
+        trend_layout.addLayout(trend_controls)
+        trend_layout.addWidget(self.trend_chart)
+        trend_layout.addWidget(QLabel("Scroll to zoom, drag to pan."))
+        
+        trend_tab = QWidget()
+        trend_tab.setLayout(trend_layout)
+        self.tabs.addTab(trend_tab, "Trends")
+        self.tabs.currentChanged.connect(self.tab_changed)
+
         main_layout = QVBoxLayout()
         main_layout.addWidget(self.tabs)
         self.setLayout(main_layout)
@@ -388,8 +1519,7 @@ class Report(QWidget):
         
         self.settings['handpacks'][name] = float(price)
         
-        with open(resource_path("settings.json"), 'w') as f:
-            json.dump(self.settings, f, indent=2)
+        self.save_settings()
             
     def add_handpack_field_to_container(self, name, price, container):
         layout = QHBoxLayout()
@@ -407,11 +1537,11 @@ class Report(QWidget):
         
         self.settings['handpacks'][name] = float(price)
         
-        with open(resource_path("settings.json"), 'w') as f:
-            json.dump(self.settings, f, indent=2)
+        self.save_settings()
             
     def show_add_handpack_dialog(self):
         dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
         dialog.setWindowTitle("Add New Hand Pack")
         
         name_input = QLineEdit()
@@ -448,6 +1578,7 @@ class Report(QWidget):
             return
             
         dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
         dialog.setWindowTitle("Edit Hand Pack")
         
         name_combo = QComboBox()
@@ -484,8 +1615,7 @@ class Report(QWidget):
                 new_price = float(price_input.text())
                 self.handpack_fields[name].setText(f"{new_price:.4f}")
                 self.settings['handpacks'][name] = new_price
-                with open(resource_path("settings.json"), 'w') as f:
-                    json.dump(self.settings, f, indent=2)
+                self.save_settings()
                 self.rebuild_handpack_section()
                 self.refresh_handpack()
             except ValueError:
@@ -497,6 +1627,7 @@ class Report(QWidget):
             return
             
         dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
         dialog.setWindowTitle("Delete Hand Pack")
         
         name_combo = QComboBox()
@@ -527,8 +1658,7 @@ class Report(QWidget):
                 if name in self.handpack_fields:
                     del self.handpack_fields[name]
                 
-                with open(resource_path("settings.json"), 'w') as f:
-                    json.dump(self.settings, f, indent=2)
+                self.save_settings()
                 
                 self.handpack_fields.clear()
                 
@@ -569,6 +1699,7 @@ class Report(QWidget):
             return
             
         dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
         dialog.setWindowTitle("Edit Machine Prices")
         dialog.setMinimumWidth(400)
         
@@ -634,14 +1765,14 @@ class Report(QWidget):
                     self.settings['prices'] = {}
                 self.settings['prices'][line] = [over_price, under_price]
                 
-                with open(resource_path("settings.json"), 'w') as f:
-                    json.dump(self.settings, f, indent=2)
+                self.save_settings()
                     
             except ValueError:
                 QMessageBox.warning(self, "Invalid Price", "Please enter valid numbers for the prices.")
                 
     def show_edit_threshold_dialog(self):
         dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
         dialog.setWindowTitle("Edit Quantity Threshold")
         
         threshold_input = QLineEdit(str(self.qty_threshold))
@@ -665,8 +1796,7 @@ class Report(QWidget):
                     self.qty_threshold = new_threshold
                     self.settings['qty_threshold'] = new_threshold
                     
-                    with open(resource_path("settings.json"), 'w') as f:
-                        json.dump(self.settings, f, indent=2)
+                    self.save_settings()
                     
                     # Update the labels in the machine layout
                     self.update_machine_labels()
@@ -675,6 +1805,166 @@ class Report(QWidget):
             except ValueError:
                 QMessageBox.warning(self, "Invalid Threshold", "Please enter a valid number for the threshold.")
                 
+    def show_whatif_dialog(self):
+        dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
+        dialog.setWindowTitle("What-If Analysis")
+        dialog.setMinimumWidth(400)
+        
+        # Grids are comma separated values or start:stop:step ranges
+        wage_input = QLineEdit(self.wage_input.text())
+        threshold_input = QLineEdit(str(self.qty_threshold))
+        over_input = QLineEdit("0")
+        under_input = QLineEdit("0")
+        for field in (wage_input, threshold_input, over_input, under_input):
+            field.setPlaceholderText("e.g. 10, 12 or 10:14:0.5")
+        
+        form_layout = QFormLayout()
+        form_layout.addRow("Wages ($/hr):", wage_input)
+        form_layout.addRow("Quantity Thresholds:", threshold_input)
+        form_layout.addRow("Over Price Change (%):", over_input)
+        form_layout.addRow("Under Price Change (%):", under_input)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Contribution of all stored shifts under each combination,\n"
+                                "with per-line break-even quantity and crew size."))
+        layout.addLayout(form_layout)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+        
+        if dialog.exec():
+            try:
+                wages = parse_grid(wage_input.text())
+                thresholds = parse_grid(threshold_input.text())
+                over_changes = parse_grid(over_input.text())
+                under_changes = parse_grid(under_input.text())
+            except ValueError:
+                QMessageBox.warning(self, "Invalid Grid", "Please enter numbers separated by commas, or start:stop:step ranges.")
+                return
+            
+            prices = {}
+            for line, (over_field, under_field) in self.machine_fields.items():
+                try:
+                    prices[line] = (float(over_field.text()), float(under_field.text()))
+                except ValueError:
+                    continue
+            
+            s = Sweeper(wages, thresholds, over_changes, under_changes, prices)
+            s.signals.file_saved_as.connect(self.show_output)
+            s.signals.error.connect(lambda message: QMessageBox.warning(self, "What-If Analysis", message))
+            self.threadpool.start(s)
+            
+    def show_output(self, outfile):
+        try:
+            os.startfile(outfile) # type: ignore
+        except Exception:
+            QMessageBox.information(self, "Finished", f"{outfile} has been saved.")
+                
+    def show_regenerate_dialog(self):
+        from datetime import datetime
+        
+        dialog = QDialog(self)
+        dialog.finished.connect(dialog.deleteLater)
+        dialog.setWindowTitle("Regenerate Reports")
+        
+        today = datetime.today().strftime("%Y-%m-%d")
+        from_input = QLineEdit(today)
+        to_input = QLineEdit(today)
+        
+        form_layout = QFormLayout()
+        form_layout.addRow("From (YYYY-MM-DD):", from_input)
+        form_layout.addRow("To (YYYY-MM-DD):", to_input)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Reports are redrawn with the wage and prices in force when each was generated."))
+        layout.addLayout(form_layout)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+        
+        if dialog.exec():
+            try:
+                start = datetime.strptime(from_input.text().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+                end = datetime.strptime(to_input.text().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                QMessageBox.warning(self, "Invalid Date", "Please enter dates as YYYY-MM-DD.")
+                return
+            
+            # One report per shift, the latest submission, so no two generators write the same file
+            records = [record for record in ReportHistory().shifts() if start <= record['date'] <= end]
+            if not records:
+                QMessageBox.information(self, "Regenerate Reports", "No reports were generated in that range.")
+                return
+            
+            # Pricing comes from the in-memory history, so no file is read per report
+            self.regenerate_pending = len(records)
+            self.regenerate_errors = []
+            for record in records:
+                pricing = self.price_history.snapshot(record.get('generated_at', record['date']))
+                data = ReportHistory.to_report_data(record, pricing)
+                data['pdf_profile'] = self.pdf_profile.currentText()
+                g = Generator(data, pricing)
+                g.signals.bytes_written.connect(self.show_bytes_written)
+                g.signals.file_saved_as.connect(self.regenerated)
+                g.signals.error.connect(self.regenerate_failed)
+                self.threadpool.start(g)
+                
+    def regenerated(self, outfile):
+        self.regenerate_pending -= 1
+        if not self.regenerate_pending:
+            message = "All reports have been regenerated."
+            if self.regenerate_errors:
+                message = f"{len(self.regenerate_errors)} report(s) failed: {self.regenerate_errors[0]}"
+            QMessageBox.information(self, "Regenerate Reports", message)
+            
+    def regenerate_failed(self, error):
+        self.regenerate_errors.append(error)
+        self.regenerated(None)
+                
+    def update_pdf_profile(self, profile):
+        self.settings['pdf_profile'] = profile
+        self.save_settings()
+        
+    def show_bytes_written(self, outfile, size):
+        self.status_label.setText(f"Saved {outfile} ({size / 1024:,.1f} KB)")
+        
+    def update_station(self):
+        self.settings['station'] = self.station_input.text().strip()
+        self.settings['plant'] = self.plant_input.text().strip()
+        self.save_settings()
+        
+    def export_history(self):
+        from datetime import datetime
+        
+        station = self.station_input.text().strip() or socket.gethostname()
+        today = datetime.today().strftime("%Y-%m-%d")
+        path, _ = QFileDialog.getSaveFileName(self, "Export History", f"history_{station}_{today}.jsonl.gz",
+                                              "History Archives (*.jsonl.gz)")
+        if not path:
+            return
+        try:
+            write_archive(path, ReportHistory().load(), station, self.plant_input.text().strip() or station)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+            return
+        QMessageBox.information(self, "Export History", f"History has been exported: {path}")
+        
+    def merge_histories(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Merge Histories", "", "History Archives (*.jsonl.gz)")
+        if not paths:
+            return
+        m = Merger(paths)
+        m.signals.file_saved_as.connect(self.show_output)
+        m.signals.error.connect(lambda message: QMessageBox.warning(self, "Merge Histories", message))
+        self.threadpool.start(m)
+                
     def update_machine_labels(self):
         # Update the threshold labels in the machine layout
         threshold_label = f"Over {self.qty_threshold}"
@@ -706,34 +1996,34 @@ class Report(QWidget):
                               f"Quantity threshold updated to {self.qty_threshold}.")
                               
     def add_recent_name(self, name):
-        """Add a name to the recent names list and update the combo box"""
+        """Record a name on the roster and move it to the top of the combo box"""
         if not name or not name.strip():
             return
             
         name = name.strip()
-        recent_names = self.settings.get('recent_names', [])
-        
-        # Remove the name if it already exists (to move it to the top)
-        if name in recent_names:
-            recent_names.remove(name)
-        
-        # Add the name to the beginning of the list
-        recent_names.insert(0, name)
-        
-        # Keep only the last 10 names
-        recent_names = recent_names[:10]
+        self.roster.record(name)
+        
+        # Move the name to the top of the combo box, keeping 10 names
+        index = self.name.findText(name)
+        if index != 0:
+            if index > 0:
+                self.name.removeItem(index)
+            self.name.insertItem(0, name)
+        while self.name.count() > 10:
+            self.name.removeItem(self.name.count() - 1)
+        self.name.setCurrentIndex(0)
         
         # Update settings
-        self.settings['recent_names'] = recent_names
-        
-        # Update the combo box
-        self.name.clear()
-        if recent_names:
-            self.name.addItems(recent_names)
+        self.settings['recent_names'] = [self.name.itemText(i) for i in range(self.name.count())]
+        self.settings['roster'] = self.roster.to_settings()
         
         # Save to file
-        with open(resource_path("settings.json"), 'w') as f:
-            json.dump(self.settings, f, indent=2)
+        self.save_settings()
+
+    def update_name_suggestions(self, text):
+        self.name_model.setStringList(self.roster.search(text))
+        if text.strip():
+            self.name_completer.complete()
                 
     def refresh_handpack(self):
         handpack_names = ["Not Run"] + list(self.settings["handpacks"].keys())
@@ -747,6 +2037,14 @@ class Report(QWidget):
                 combo.setCurrentIndex(handpack_names.index(current_value))
 
 
+    def save_settings(self):
+        """Write settings.json, keeping a dated version of any pricing change"""
+        self.settings.setdefault('handpacks', {})
+        self.price_history.record_settings(self.settings)
+        self.settings['price_history'] = self.price_history.to_settings()
+        with open(resource_path("settings.json"), 'w') as f:
+            json.dump(self.settings, f, indent=2)
+
     def load_settings(self):
         if os.path.exists(resource_path("settings.json")):
             with open(resource_path("settings.json"), 'r') as f:
@@ -760,6 +2058,16 @@ class Report(QWidget):
         if not name:
             QMessageBox.warning(self, "Missing Information", "Please enter your full name.")
             return
+
+        # Catch misspellings of a known operator before they split the reports
+        suggestion = self.roster.closest(name)
+        if suggestion:
+            reply = QMessageBox.question(self, "Similar Name Found",
+                                       f"'{name}' is not on the roster. Did you mean '{suggestion}'?",
+                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.Yes:
+                name = suggestion
+                self.name.setCurrentText(name)
             
         self.generate_btn.setDisabled(True)
 
@@ -798,9 +2106,28 @@ class Report(QWidget):
             'lines': line_data,
             'notes': self.notes.toPlainText(),
             'wage': wage,
-            'prices': prices
+            'prices': prices,
+            'pdf_profile': self.pdf_profile.currentText()
         }
         
+        # Check the entries against earlier shifts before anything is saved
+        rows = calculate_rows(data, self.settings)
+        flags = self.anomalies.check(rows)
+        for line, fields in self.line_fields.items():
+            fields['qty'].setStyleSheet("border: 1px solid red;" if line in flags else "")
+        if flags:
+            details = "\n".join(f"{line}: {'; '.join(reasons)}" for line, reasons in flags.items())
+            reply = QMessageBox.question(self, "Unusual Entries",
+                                       f"These lines look unusual:\n\n{details}\n\nGenerate the report anyway? "
+                                       "Flagged lines will be marked in the PDF.",
+                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                self.generate_btn.setDisabled(False)
+                return
+        data['flags'] = flags
+        # Counted once the PDF is saved; flagged lines are held out of the stats
+        self.pending_rows = (rows, flags)
+
         # Add the name to recent names
         self.add_recent_name(name)
 
@@ -823,14 +2150,83 @@ class Report(QWidget):
             except ValueError:
                 continue
 
-        with open(resource_path("settings.json"), 'w') as f:
-            json.dump(self.settings, f, indent=2)
+        self.save_settings()
 
         g = Generator(data)
+        g.signals.bytes_written.connect(self.show_bytes_written)
+        g.signals.result.connect(self.update_line_stats)
+        g.signals.result.connect(self.add_trend_record)
         g.signals.file_saved_as.connect(self.generated)
         g.signals.error.connect(print)
         self.threadpool.start(g)
 
+    def tab_changed(self, index):
+        if index == 2 and self.trends is None:
+            self.load_trends()
+            
+    def load_trends(self):
+        loader = TrendLoader()
+        loader.signals.result.connect(self.trends_loaded)
+        loader.signals.error.connect(print)
+        self.threadpool.start(loader)
+        
+    def trends_loaded(self, trends):
+        self.trends = trends
+        self.trend_cache = {}
+        self.trend_pending = set()
+        self.trend_version += 1
+        self.show_trend()
+        
+    def trend_key(self):
+        return (self.trend_metric.currentText(), self.trend_line.currentText(), self.trend_shift.currentText())
+        
+    def show_trend(self):
+        if self.trends is None:
+            return
+        key = self.trend_key()
+        days, values = self.trends.series.get(key, ([], []))
+        self.trend_chart.set_series(self.trend_cache.setdefault(key, {}), (days[0], days[-1]) if days else None)
+        
+    def downsample_trend(self, level):
+        key = self.trend_key()
+        if self.trends is None or (key, level) in self.trend_pending:
+            return
+        self.trend_pending.add((key, level))
+        days, values = self.trends.series.get(key, ([], []))
+        d = Downsampler(list(days), list(values), key, level, self.trend_version)
+        d.signals.result.connect(self.trend_downsampled)
+        self.threadpool.start(d)
+        
+    def trend_downsampled(self, result):
+        version, key, level, buckets = result
+        if version != self.trend_version:
+            return  # computed from series that have since been reloaded or added to
+        self.trend_pending.discard((key, level))
+        self.trend_cache.setdefault(key, {})[level] = buckets
+        if key == self.trend_key():
+            self.trend_chart.update()
+
+    def update_line_stats(self, record):
+        if self.pending_rows is None:
+            return
+        rows, flags = self.pending_rows
+        self.anomalies.update(rows, f"{record['date']}|{record['shift']}", flags)
+        self.pending_rows = None
+        self.settings['line_stats'] = self.anomalies.to_settings()
+        self.settings['line_stats_recent'] = self.anomalies.recent
+        self.settings['line_stats_held'] = self.anomalies.held
+        self.save_settings()
+
+    def add_trend_record(self, record):
+        # Add the new report to the loaded trends rather than reading the whole history again
+        if self.trends is None:
+            return
+        self.trends.add(record)
+        self.trend_cache = {}
+        self.trend_pending = set()
+        self.trend_version += 1
+        self.show_trend()
+
     def generated(self, outfile):
         self.generate_btn.setDisabled(False)
         try:
@@ -838,7 +2234,153 @@ class Report(QWidget):
         except Exception as e:
             QMessageBox.information(self, "Finished", f"PDF has been generated: {outfile}")
 
-app = QApplication([])
-r = Report()
-r.show()
-app.exec()
+def soak(cycles=2000, samples=10):
+    """Drive generate/edit/delete cycles headlessly and fail if resource use keeps growing.
+
+    Runs in a temporary directory under the offscreen Qt platform with message boxes
+    answered automatically. Memory (tracemalloc and RSS), open files, widgets and
+    live QObject wrappers are sampled through the run; a metric fails when its
+    average over the last third of the samples is above the middle third by more
+    than its tolerance. Returns 0 when all are flat, 1 otherwise.
+    """
+    import gc
+    import shutil
+    import tempfile
+    import tracemalloc
+    from PyQt6.QtCore import QCoreApplication, QEvent
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    logo = resource_path("logo.jpeg")
+    workdir = tempfile.mkdtemp(prefix="report_soak_")
+    os.chdir(workdir)
+    if os.path.exists(logo):
+        shutil.copy(logo, "logo.jpeg")
+    else:
+        from PIL import Image
+        Image.new("RGB", (1500, 188), "white").save("logo.jpeg")
+
+    # Pricing versions are kept forever by design, so pin their clock to keep
+    # repeated edits from adding versions
+    PriceHistory.timestamp = staticmethod(lambda when=None: "2000-01-01T00:00:00")
+    QMessageBox.information = staticmethod(lambda *args: QMessageBox.StandardButton.Ok)
+    QMessageBox.warning = staticmethod(lambda *args: QMessageBox.StandardButton.Ok)
+    QMessageBox.question = staticmethod(lambda *args: QMessageBox.StandardButton.Yes)
+
+    # Each dialog is answered by the next queued function, or rejected if none is queued
+    answers = []
+    def exec_dialog(dialog):
+        answer = answers.pop(0) if answers else None
+        if answer:
+            answer(dialog)
+        dialog.done(1 if answer else 0)
+        return 1 if answer else 0
+    QDialog.exec = exec_dialog
+
+    def fill(*texts, combo=None):
+        def answer(dialog):
+            if combo:
+                dialog.findChildren(QComboBox)[0].setCurrentText(combo)
+            for edit, text in zip(dialog.findChildren(QLineEdit), texts):
+                if text is not None:
+                    edit.setText(text)
+        return answer
+
+    app = QApplication.instance() or QApplication([])
+    report = Report()
+    report.show()
+    report.settings.setdefault('handpacks', {})
+
+    def settle():
+        report.threadpool.waitForDone()
+        app.processEvents()
+        # What returning to the event loop would do for deleteLater()
+        QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+        app.processEvents()
+
+    def open_files():
+        fd_dir = "/proc/self/fd"
+        return len(os.listdir(fd_dir)) if os.path.isdir(fd_dir) else 0
+
+    def rss():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def qobjects():
+        return sum(1 for obj in gc.get_objects() if isinstance(obj, QObject))
+
+    tolerances = {
+        'tracemalloc bytes': 512 * 1024,
+        'rss bytes': 8 * 1024 * 1024,
+        'open files': 0,
+        'widgets': 0,
+        'qobjects': 0,
+    }
+    history = {metric: [] for metric in tolerances}
+    names = ["Alice Smith", "Bob Jones", "Carol White"]
+
+    tracemalloc.start()
+    for cycle in range(cycles):
+        report.name.setCurrentText(names[cycle % len(names)])
+        report.shift.setValue(1 + cycle % 2)
+        fields = report.line_fields['AZ']
+        fields['type'].setCurrentText("Rotary")
+        fields['qty'].setText(str(5000 + cycle % 50 * 20))
+        fields['ple'].setValue(3)
+        fields['hrs'].setValue(8)
+        report.generate()
+        settle()
+
+        answers.append(fill("Soak", "0.5000"))
+        report.show_add_handpack_dialog()
+        answers.append(fill(f"{0.5 + cycle % 2 / 10:.4f}", combo="Soak"))
+        report.show_edit_handpack_dialog()
+        answers.append(fill(combo="Soak"))
+        report.show_delete_handpack_dialog()
+        answers.append(fill())
+        report.show_edit_machine_dialog()
+        answers.append(fill())
+        report.show_edit_threshold_dialog()
+        report.show_whatif_dialog()
+        report.tabs.setCurrentIndex(2 if cycle % 10 == 0 else 0)
+        settle()
+
+        if (cycle + 1) % max(cycles // samples, 1) == 0:
+            gc.collect()
+            history['tracemalloc bytes'].append(tracemalloc.get_traced_memory()[0])
+            history['rss bytes'].append(rss())
+            history['open files'].append(open_files())
+            history['widgets'].append(len(QApplication.allWidgets()))
+            history['qobjects'].append(qobjects())
+            print(f"cycle {cycle + 1}: " + ", ".join(f"{m} {v[-1]:,}" for m, v in history.items()))
+    tracemalloc.stop()
+
+    failed = False
+    for metric, values in history.items():
+        third = len(values) // 3
+        if third == 0:
+            continue
+        middle = sum(values[third:2 * third]) / third
+        last = sum(values[-third:]) / third
+        if last - middle > tolerances[metric]:
+            print(f"FAIL {metric} grew from {middle:,.0f} to {last:,.0f}")
+            failed = True
+
+    report.close()
+    os.chdir(os.path.dirname(workdir))
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    # Merges run archives in worker processes, which re-import this module
+    multiprocessing.freeze_support()
+    if "--soak" in sys.argv:
+        # python report.py --soak [cycles]
+        args = sys.argv[sys.argv.index("--soak") + 1:]
+        sys.exit(soak(int(args[0]) if args else 2000))
+    app = QApplication([])
+    r = Report()
+    r.show()
+    app.exec()